@@ -6,17 +6,28 @@ Supports multiple user profiles (channels).
 """
 
 import os
-import json
+import re
+import time
+import asyncio
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import Optional
-from datetime import datetime
+from typing import Optional, Dict, List, Tuple
+from datetime import datetime, timedelta
 
 from fastapi import APIRouter, HTTPException, Query, Response
 from fastapi.responses import RedirectResponse
 from google_auth_oauthlib.flow import Flow
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
+from googleapiclient.discovery import build, Resource
+from googleapiclient.errors import HttpError
+from googleapiclient.http import build_http
+from google_auth_httplib2 import AuthorizedHttp
+from requests import Session
+from requests.adapters import HTTPAdapter
+import orjson
+
+from store import get_redis
 
 router = APIRouter()
 
@@ -30,8 +41,29 @@ SCOPES = [
 TOKENS_DIR = Path(__file__).parent / "tokens"
 TOKENS_DIR.mkdir(exist_ok=True)
 
-# In-memory session storage (for demo; use Redis in production)
-pending_auth_sessions = {}
+# Anything other than letters, digits, "_" and "-" is stripped from profile names
+UNSAFE_PROFILE_CHARS = re.compile(r"[^\w-]")
+
+# Redis is the primary token store; token files are kept as cold backup
+TOKEN_CACHE_TTL = 30 * 24 * 3600  # 30 days
+AUTH_SESSION_TTL = 10 * 60  # Pending OAuth state expires after 10 minutes
+CHANNEL_CACHE_TTL = 24 * 3600  # Channel title/thumbnail shown by /status
+
+# Background refresh: tokens expiring within the window are renewed ahead of time
+TOKEN_REFRESH_INTERVAL = 60
+TOKEN_REFRESH_WINDOW = timedelta(minutes=5)
+
+# Built YouTube clients per profile: profile -> (expires_at, credentials, client)
+# Entries are dropped 60s before the access token expires, and are only reused
+# while their access token still matches the one stored in Redis
+_client_cache: Dict[str, Tuple[float, Credentials, Resource]] = {}
+CLIENT_EXPIRY_MARGIN = 60
+CLIENT_DEFAULT_TTL = 50 * 60  # Used when the token carries no expiry
+
+# Shared keep-alive transport for token refreshes, so they reuse TLS connections
+_token_session = Session()
+_token_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=32))
+_token_request = Request(session=_token_session)
 
 
 def get_oauth_config():
@@ -56,30 +88,61 @@ def get_oauth_config():
     }
 
 
+@lru_cache(maxsize=1024)
+def sanitize_profile(profile: str) -> str:
+    """Sanitize profile name to prevent path traversal"""
+    return UNSAFE_PROFILE_CHARS.sub("", profile)
+
+
+@lru_cache(maxsize=1024)
 def get_token_path(profile: str) -> Path:
     """Get token file path for a specific user profile"""
-    # Sanitize profile name to prevent path traversal
-    safe_profile = "".join(c for c in profile if c.isalnum() or c in "_-")
-    return TOKENS_DIR / f"token_{safe_profile}.json"
+    return TOKENS_DIR / f"token_{sanitize_profile(profile)}.json"
 
 
-def load_credentials(profile: str) -> Optional[Credentials]:
-    """Load stored credentials for a profile"""
-    token_path = get_token_path(profile)
+def get_token_key(profile: str) -> str:
+    """Get Redis key holding the token for a specific user profile"""
+    return f"tok:{sanitize_profile(profile)}"
+
+
+def get_channel_key(profile: str) -> str:
+    """Get Redis key holding cached channel info for a specific user profile"""
+    return f"chan:{sanitize_profile(profile)}"
+
+
+async def load_token_data(profile: str) -> Optional[dict]:
+    """Load raw token data from Redis, falling back to the token file"""
+    redis = get_redis()
+    key = get_token_key(profile)
+    
+    cached = await redis.get(key)
+    if cached is not None:
+        return orjson.loads(cached)
     
-    if not token_path.exists():
+    try:
+        with open(get_token_path(profile), "rb") as f:
+            token_data = orjson.loads(f.read())
+    except (FileNotFoundError, orjson.JSONDecodeError):
         return None
     
+    # Repopulate cache from the cold backup
+    await redis.set(key, orjson.dumps(token_data), ex=TOKEN_CACHE_TTL)
+    return token_data
+
+
+async def load_credentials(profile: str) -> Optional[Credentials]:
+    """Load stored credentials for a profile"""
     try:
-        with open(token_path, "r") as f:
-            token_data = json.load(f)
+        token_data = await load_token_data(profile)
+        if token_data is None:
+            return None
         
         creds = Credentials.from_authorized_user_info(token_data, SCOPES)
         
-        # Refresh if expired
+        # Refresh if expired (normally done ahead of time by the background refresher)
         if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-            save_credentials(profile, creds)
+            await asyncio.get_running_loop().run_in_executor(None, creds.refresh, _token_request)
+            await save_credentials(profile, creds)
         
         return creds if creds and creds.valid else None
     except Exception as e:
@@ -87,8 +150,26 @@ def load_credentials(profile: str) -> Optional[Credentials]:
         return None
 
 
-def save_credentials(profile: str, creds: Credentials):
-    """Save credentials to file"""
+async def is_valid(profile: str) -> bool:
+    """
+    Check whether a profile has an unexpired access token.
+    Reads only the stored expiry; no Credentials object is built and nothing is refreshed.
+    """
+    try:
+        token_data = await load_token_data(profile)
+        if not token_data or not token_data.get("token"):
+            return False
+        
+        expiry = token_data.get("expiry")
+        return expiry is None or datetime.fromisoformat(expiry) > datetime.utcnow()
+    except Exception as e:
+        # Unreadable token or malformed/offset-aware expiry: report this profile only
+        print(f"Error checking credentials for {profile}: {e}")
+        return False
+
+
+async def save_credentials(profile: str, creds: Credentials):
+    """Save credentials to Redis and to the token file (cold backup)"""
     token_path = get_token_path(profile)
     
     token_data = {
@@ -101,8 +182,125 @@ def save_credentials(profile: str, creds: Credentials):
         "expiry": creds.expiry.isoformat() if creds.expiry else None
     }
     
-    with open(token_path, "w") as f:
-        json.dump(token_data, f, indent=2)
+    await get_redis().set(get_token_key(profile), orjson.dumps(token_data), ex=TOKEN_CACHE_TTL)
+    
+    with open(token_path, "wb") as f:
+        f.write(orjson.dumps(token_data, option=orjson.OPT_INDENT_2))
+    
+    invalidate_client(profile)
+
+
+async def get_stored_access_token(profile: str) -> Optional[str]:
+    """Get the access token currently stored in Redis for a profile"""
+    cached = await get_redis().get(get_token_key(profile))
+    return orjson.loads(cached).get("token") if cached is not None else None
+
+
+async def get_cached_client_entry(profile: str) -> Optional[Tuple[Credentials, Resource]]:
+    """
+    Get the credentials and authenticated YouTube API client for a profile.
+    Reuses the built client until its access token is about to expire.
+    """
+    key = sanitize_profile(profile)
+    cached = _client_cache.get(key)
+    
+    # Another worker may have logged out, re-linked or refreshed the profile,
+    # so the cached client is only valid while it matches the stored token
+    if (
+        cached
+        and time.monotonic() < cached[0]
+        and cached[1].token == await get_stored_access_token(profile)
+    ):
+        return cached[1], cached[2]
+    
+    creds = await load_credentials(profile)
+    if not creds:
+        _client_cache.pop(key, None)
+        return None
+    
+    if creds.expiry:
+        ttl = (creds.expiry - datetime.utcnow()).total_seconds() - CLIENT_EXPIRY_MARGIN
+    else:
+        ttl = CLIENT_DEFAULT_TTL
+    
+    # Use the discovery document bundled with the client library (no HTTP fetch)
+    youtube = await asyncio.get_running_loop().run_in_executor(None, partial(
+        build, "youtube", "v3", credentials=creds, static_discovery=True, cache_discovery=False
+    ))
+    _client_cache[key] = (time.monotonic() + ttl, creds, youtube)
+    return creds, youtube
+
+
+async def get_cached_client(profile: str) -> Optional[Resource]:
+    """Get an authenticated YouTube API client for a profile"""
+    entry = await get_cached_client_entry(profile)
+    return entry[1] if entry else None
+
+
+def invalidate_client(profile: str):
+    """Drop the cached YouTube client for a profile"""
+    _client_cache.pop(sanitize_profile(profile), None)
+
+
+def list_profile_names() -> List[str]:
+    """List profiles that have a stored token file"""
+    return [token_file.stem.replace("token_", "") for token_file in TOKENS_DIR.glob("token_*.json")]
+
+
+async def refresh_expiring_credentials():
+    """Refresh stored credentials that expire within TOKEN_REFRESH_WINDOW"""
+    # Only one worker process needs to run each pass
+    acquired = await get_redis().set(
+        "lock:token_refresh", "1", nx=True, ex=TOKEN_REFRESH_INTERVAL - 5
+    )
+    if not acquired:
+        return
+    
+    loop = asyncio.get_running_loop()
+    
+    for profile in list_profile_names():
+        try:
+            token_data = await load_token_data(profile)
+            if not token_data or not token_data.get("refresh_token"):
+                continue
+            
+            # Tokens without an expiry never expire (same as Credentials.expired)
+            creds = Credentials.from_authorized_user_info(token_data, SCOPES)
+            if not creds.expiry or creds.expiry - datetime.utcnow() > TOKEN_REFRESH_WINDOW:
+                continue
+            
+            await loop.run_in_executor(None, creds.refresh, _token_request)
+            await save_credentials(profile, creds)
+        except Exception as e:
+            print(f"Error refreshing credentials for {profile}: {e}")
+
+
+async def save_auth_session(state: str, profile: str):
+    """Store OAuth state -> profile mapping until the callback arrives"""
+    key = f"auth:state:{state}"
+    
+    async with get_redis().pipeline(transaction=True) as pipe:
+        pipe.hset(key, mapping={
+            "profile": profile,
+            "created_at": datetime.now().isoformat()
+        })
+        pipe.expire(key, AUTH_SESSION_TTL)
+        await pipe.execute()
+
+
+async def pop_auth_session(state: str) -> Optional[dict]:
+    """Fetch and remove a pending OAuth session"""
+    key = f"auth:state:{state}"
+    
+    async with get_redis().pipeline(transaction=True) as pipe:
+        pipe.hgetall(key)
+        pipe.delete(key)
+        session_data, _ = await pipe.execute()
+    
+    if not session_data:
+        return None
+    
+    return {k.decode(): v.decode() for k, v in session_data.items()}
 
 
 @router.get("/login")
@@ -128,10 +326,7 @@ async def login(profile: str = Query(default="default", description="User profil
         )
         
         # Store state -> profile mapping
-        pending_auth_sessions[state] = {
-            "profile": profile,
-            "created_at": datetime.now().isoformat()
-        }
+        await save_auth_session(state, profile)
         
         return RedirectResponse(url=authorization_url)
     
@@ -154,7 +349,7 @@ async def callback(code: str = None, state: str = None, error: str = None):
         return RedirectResponse(url=f"{frontend_url}?auth_error=missing_params")
     
     # Get profile from state
-    session_data = pending_auth_sessions.pop(state, None)
+    session_data = await pop_auth_session(state)
     if not session_data:
         return RedirectResponse(url=f"{frontend_url}?auth_error=invalid_state")
     
@@ -174,8 +369,9 @@ async def callback(code: str = None, state: str = None, error: str = None):
         flow.fetch_token(code=code)
         creds = flow.credentials
         
-        # Save credentials
-        save_credentials(profile, creds)
+        # Save credentials (the profile may now point at a different channel)
+        await save_credentials(profile, creds)
+        await get_redis().delete(get_channel_key(profile))
         
         # Redirect back to frontend with success
         return RedirectResponse(url=f"{frontend_url}?auth_success=true&profile={profile}")
@@ -191,41 +387,62 @@ async def auth_status(profile: str = Query(default="default")):
     Check authentication status for a profile.
     Returns channel info if authenticated.
     """
-    creds = load_credentials(profile)
+    unauthenticated = {
+        "authenticated": False,
+        "profile": profile,
+        "channel": None
+    }
     
-    if not creds:
+    # Check the token first; a client is only built if the channel isn't cached
+    if not await load_credentials(profile):
+        return unauthenticated
+    
+    redis = get_redis()
+    channel_key = get_channel_key(profile)
+    
+    cached = await redis.get(channel_key)
+    if cached is not None:
         return {
-            "authenticated": False,
+            "authenticated": True,
             "profile": profile,
-            "channel": None
+            "channel": orjson.loads(cached)
         }
     
+    entry = await get_cached_client_entry(profile)
+    if not entry:
+        return unauthenticated
+    
+    creds, youtube = entry
+    
     try:
-        # Get channel info
-        youtube = build("youtube", "v3", credentials=creds)
-        response = youtube.channels().list(
-            part="snippet",
-            mine=True
-        ).execute()
+        # Get channel info, on a connection of its own: the cached client's
+        # httplib2 connection is not thread-safe
+        response = await asyncio.get_running_loop().run_in_executor(None, partial(
+            youtube.channels().list(part="snippet", mine=True).execute,
+            http=AuthorizedHttp(creds, http=build_http())
+        ))
         
+        channel = None
         if response.get("items"):
-            channel = response["items"][0]["snippet"]
-            return {
-                "authenticated": True,
-                "profile": profile,
-                "channel": {
-                    "title": channel.get("title"),
-                    "thumbnail": channel.get("thumbnails", {}).get("default", {}).get("url")
-                }
-            }
-        else:
-            return {
-                "authenticated": True,
-                "profile": profile,
-                "channel": None
+            snippet = response["items"][0]["snippet"]
+            channel = {
+                "title": snippet.get("title"),
+                "thumbnail": snippet.get("thumbnails", {}).get("default", {}).get("url")
             }
+        
+        # Don't cache another account's channel if the profile was re-linked meanwhile
+        if creds.token == await get_stored_access_token(profile):
+            await redis.set(channel_key, orjson.dumps(channel), ex=CHANNEL_CACHE_TTL)
+        
+        return {
+            "authenticated": True,
+            "profile": profile,
+            "channel": channel
+        }
     
     except Exception as e:
+        if isinstance(e, HttpError) and e.resp.status == 401:
+            invalidate_client(profile)
         print(f"Error getting channel info: {e}")
         return {
             "authenticated": False,
@@ -238,16 +455,18 @@ async def auth_status(profile: str = Query(default="default")):
 @router.get("/profiles")
 async def list_profiles():
     """List all saved profiles/tokens"""
-    profiles = []
+    profile_names = list_profile_names()
     
-    for token_file in TOKENS_DIR.glob("token_*.json"):
-        profile_name = token_file.stem.replace("token_", "")
-        creds = load_credentials(profile_name)
-        
-        profiles.append({
+    # Tokens are kept fresh by the background refresher, so the stored expiry is enough
+    all_valid = await asyncio.gather(*(is_valid(name) for name in profile_names))
+    
+    profiles = [
+        {
             "name": profile_name,
-            "authenticated": creds is not None and creds.valid
-        })
+            "authenticated": valid
+        }
+        for profile_name, valid in zip(profile_names, all_valid)
+    ]
     
     return {"profiles": profiles}
 
@@ -256,9 +475,16 @@ async def list_profiles():
 async def logout(profile: str = Query(default="default")):
     """Remove stored credentials for a profile"""
     token_path = get_token_path(profile)
+    removed = await get_redis().delete(get_token_key(profile), get_channel_key(profile))
+    invalidate_client(profile)
     
-    if token_path.exists():
+    try:
         token_path.unlink()
+        removed = True
+    except FileNotFoundError:
+        pass
+    
+    if removed:
         return {"success": True, "message": f"Logged out from profile: {profile}"}
     
     return {"success": True, "message": "No credentials to remove"}
@@ -7,9 +7,11 @@ Run with: uvicorn main:app --reload --port 8000
 """
 
 import os
+import asyncio
 from pathlib import Path
 from dotenv import load_dotenv
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
@@ -17,14 +19,24 @@ from fastapi.staticfiles import StaticFiles
 load_dotenv()
 
 # Import routers
-from auth import router as auth_router
-from upload import router as upload_router
+from auth import router as auth_router, refresh_expiring_credentials, TOKEN_REFRESH_INTERVAL
+from upload import (
+    router as upload_router,
+    send_worker_heartbeat,
+    clear_worker_heartbeat,
+    recover_orphaned_jobs,
+    WORKER_HEARTBEAT_INTERVAL
+)
+
+# Shared Redis connection
+from store import init_redis, close_redis
 
 # Create FastAPI app
 app = FastAPI(
     title="YouTube AutoPilot Hub API",
     description="Backend API for YouTube batch video uploads with subtitle support",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # CORS configuration - allow frontend to access API
@@ -51,6 +63,45 @@ app.include_router(auth_router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(upload_router, prefix="/api", tags=["Upload"])
 
 
+async def _refresh_loop():
+    """Periodically refresh OAuth tokens before they expire"""
+    while True:
+        try:
+            await refresh_expiring_credentials()
+        except Exception as e:
+            print(f"Token refresh loop error: {e}")
+        await asyncio.sleep(TOKEN_REFRESH_INTERVAL)
+
+
+async def _worker_loop():
+    """Keep this worker's heartbeat alive and pick up jobs orphaned by other workers"""
+    while True:
+        try:
+            await send_worker_heartbeat()
+            await recover_orphaned_jobs()
+        except Exception as e:
+            print(f"Worker loop error: {e}")
+        await asyncio.sleep(WORKER_HEARTBEAT_INTERVAL)
+
+
+@app.on_event("startup")
+async def startup():
+    """Open the shared Redis connection pool and start background tasks"""
+    await init_redis()
+    await send_worker_heartbeat()
+    app.state.refresh_task = asyncio.create_task(_refresh_loop())
+    app.state.worker_task = asyncio.create_task(_worker_loop())
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop background tasks and close the shared Redis connection pool"""
+    app.state.refresh_task.cancel()
+    app.state.worker_task.cancel()
+    await clear_worker_heartbeat()
+    await close_redis()
+
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
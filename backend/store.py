@@ -0,0 +1,72 @@
+"""
+Redis Store Module
+===================
+Shared Redis client for credentials, OAuth sessions and upload jobs.
+One connection pool per worker process, opened on app startup.
+Pub/sub subscriptions (upload status streams) hold a connection each,
+so they get a separate, bounded pool and can't starve regular commands.
+"""
+
+import os
+from typing import Optional
+
+import redis.asyncio as redis
+
+_pool: Optional[redis.ConnectionPool] = None
+_client: Optional[redis.Redis] = None
+_pubsub_pool: Optional[redis.ConnectionPool] = None
+_pubsub_client: Optional[redis.Redis] = None
+
+
+async def init_redis() -> redis.Redis:
+    """Create the connection pools and clients (called on app startup)"""
+    global _pool, _client, _pubsub_pool, _pubsub_client
+
+    if _client is None:
+        url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+        _pool = redis.ConnectionPool.from_url(
+            url,
+            max_connections=int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+        )
+        _client = redis.Redis(connection_pool=_pool)
+        await _client.ping()
+
+        _pubsub_pool = redis.ConnectionPool.from_url(
+            url,
+            max_connections=int(os.getenv("REDIS_PUBSUB_MAX_CONNECTIONS", "100"))
+        )
+        _pubsub_client = redis.Redis(connection_pool=_pubsub_pool)
+
+    return _client
+
+
+async def close_redis():
+    """Close the clients and their connection pools (called on app shutdown)"""
+    global _pool, _client, _pubsub_pool, _pubsub_client
+
+    if _client is not None:
+        await _client.aclose()
+        await _pool.disconnect()
+        _client = None
+        _pool = None
+
+    if _pubsub_client is not None:
+        await _pubsub_client.aclose()
+        await _pubsub_pool.disconnect()
+        _pubsub_client = None
+        _pubsub_pool = None
+
+
+def get_redis() -> redis.Redis:
+    """Get the shared Redis client"""
+    if _client is None:
+        raise RuntimeError("Redis client not initialized. Call init_redis() on startup.")
+    return _client
+
+
+def get_pubsub_redis() -> redis.Redis:
+    """Get the Redis client reserved for pub/sub subscriptions"""
+    if _pubsub_client is None:
+        raise RuntimeError("Redis client not initialized. Call init_redis() on startup.")
+    return _pubsub_client
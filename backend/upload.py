@@ -5,27 +5,77 @@ Handles video and caption uploads to YouTube.
 Supports resumable uploads for large files.
 """
 
+import io
 import os
-import json
+import sys
+import mmap
+import time
+import shutil
 import uuid
+import random
 import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, BinaryIO, Callable, Set
 from datetime import datetime
 
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Query, BackgroundTasks
-from fastapi.responses import JSONResponse
-from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload, MediaIoBaseUpload
+from fastapi.responses import JSONResponse, StreamingResponse
+from googleapiclient.http import MediaFileUpload, MediaIoBaseUpload, build_http
 from googleapiclient.errors import HttpError
+from google_auth_httplib2 import AuthorizedHttp
+from redis.exceptions import ConnectionError as RedisConnectionError
 import aiofiles
+import anyio
+import orjson
+
+from auth import load_credentials, get_cached_client, invalidate_client
+from store import get_redis, get_pubsub_redis
 
 router = APIRouter()
 
-# Upload jobs storage (in-memory for demo; use Redis in production)
-upload_jobs: Dict[str, Dict[str, Any]] = {}
+# Upload jobs are stored as Redis hashes (one JSON-encoded value per field)
+# and indexed by creation time in sorted sets. Jobs expire after JOB_TTL.
+JOB_TTL = 24 * 3600
+JOBS_INDEX_KEY = "jobs:by_time"
+
+# Each worker process keeps a heartbeat key alive and jobs record the worker running them,
+# so unfinished jobs left behind by a stopped or restarted worker can be detected
+WORKER_ID = uuid.uuid4().hex
+WORKER_HEARTBEAT_INTERVAL = 10
+WORKER_HEARTBEAT_TTL = 30
+
+# Jobs are only taken over once a worker's heartbeat has been gone for a while, so a worker
+# stops sending video chunks as soon as its own heartbeat may have lapsed (monotonic time)
+_heartbeat_valid_until = 0.0
+_worker_stopping = threading.Event()
+
+# Re-queued jobs, kept referenced until they finish
+_recovered_tasks: Set[asyncio.Task] = set()
+
+# Jobs seen without a live worker: job_id -> [worker_id, first seen]. A job is only
+# recovered once it has stayed orphaned for a full heartbeat TTL, so workers that
+# briefly lost Redis get to renew their heartbeat first.
+ORPHANED_JOBS_KEY = "jobs:orphaned"
+
+# Job writes only apply while the job is still run by the expected worker, so a worker
+# whose job was taken over can't overwrite the new state.
+# ARGV: expected worker_id (JSON), TTL, published change, then field/value pairs.
+UPDATE_JOB_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+if (redis.call('HGET', KEYS[1], 'worker_id') or 'null') ~= ARGV[1] then
+    return 0
+end
+redis.call('HSET', KEYS[1], unpack(ARGV, 4))
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+redis.call('PUBLISH', KEYS[1], ARGV[3])
+return 1
+"""
+_update_job_script = None
 
 # Temporary upload directory
 UPLOAD_DIR = Path(__file__).parent / "uploads"
@@ -37,16 +87,277 @@ TOKENS_DIR = Path(__file__).parent / "tokens"
 VIDEO_EXTENSIONS = {".mp4", ".mov", ".mkv", ".avi", ".wmv", ".flv", ".webm"}
 SUBTITLE_EXTENSIONS = {".srt", ".vtt", ".sbv", ".sub", ".ass"}
 
+# Read/write size when copying incoming files to disk
+COPY_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+# Resumable upload chunk size, rounded down to a multiple of 256KB as the API requires.
+# Videos no larger than one chunk are sent in a single non-resumable request.
+UPLOAD_CHUNK_GRANULARITY = 256 * 1024
+UPLOAD_CHUNK_SIZE = max(
+    UPLOAD_CHUNK_GRANULARITY,
+    int(os.getenv("UPLOAD_CHUNK_SIZE", 8 * 1024 * 1024)) // UPLOAD_CHUNK_GRANULARITY * UPLOAD_CHUNK_GRANULARITY
+)
+
+# Videos are uploaded straight from the request's spooled temp file.
+# Set PERSIST_UPLOADS=true to also keep a copy in UPLOAD_DIR while the job runs,
+# so a job interrupted by a restart is re-queued instead of failed.
+PERSIST_UPLOADS = os.getenv("PERSIST_UPLOADS", "false").lower() in ("1", "true", "yes")
+
+# Idle seconds before a job stream re-checks the job and sends an SSE keep-alive
+STREAM_KEEPALIVE = 15
+
+# Blocking Google API calls run in this pool so they don't stall the event loop
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "8"))
+_upload_pool = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix="upload")
+
+# Retries on YouTube 5xx errors, with exponential backoff capped at MAX_RETRY_DELAY
+MAX_RETRIES = 6
+MAX_RETRY_DELAY = 60
+
+
+class JobLostError(Exception):
+    """Raised in a job's worker once another worker has taken the job over"""
+
+
+def get_job_key(job_id: str) -> str:
+    """Get Redis key holding an upload job"""
+    return f"job:{job_id}"
+
+
+def get_job_resume_key(job_id: str) -> str:
+    """Get Redis key holding what is needed to re-queue a job from its persisted copy"""
+    return f"job:{job_id}:resume"
+
+
+def get_jobs_index_key(profile: Optional[str] = None) -> str:
+    """Get Redis sorted set indexing jobs by creation time, optionally for one profile"""
+    return f"{JOBS_INDEX_KEY}:{profile}" if profile else JOBS_INDEX_KEY
+
+
+def get_worker_key(worker_id: str) -> str:
+    """Get Redis key holding a worker's heartbeat"""
+    return f"worker:{worker_id}"
+
+
+async def send_worker_heartbeat():
+    """Mark this worker process as alive"""
+    global _heartbeat_valid_until
+    sent_at = time.monotonic()
+    await get_redis().set(get_worker_key(WORKER_ID), "1", ex=WORKER_HEARTBEAT_TTL)
+    _heartbeat_valid_until = sent_at + WORKER_HEARTBEAT_TTL
+
+
+async def clear_worker_heartbeat():
+    """Mark this worker process as stopped (called on app shutdown)"""
+    _worker_stopping.set()
+    await get_redis().delete(get_worker_key(WORKER_ID))
+
+
+def wait_for_heartbeat() -> bool:
+    """
+    Block until this worker's heartbeat is current.
+    Returns False if the worker is shutting down instead.
+    """
+    while time.monotonic() >= _heartbeat_valid_until:
+        if _worker_stopping.wait(1):
+            return False
+    return True
+
+
+async def recover_orphaned_jobs():
+    """
+    Re-queue unfinished jobs whose worker is no longer alive.
+    Jobs without a persisted copy of their video are marked as failed.
+    """
+    redis = get_redis()
+    
+    # Only one worker process needs to run each pass
+    acquired = await redis.set(
+        "lock:job_recovery", WORKER_ID, nx=True, ex=WORKER_HEARTBEAT_INTERVAL - 1
+    )
+    if not acquired:
+        return
+    
+    job_ids = [job_id.decode() for job_id in await redis.zrangebyscore(
+        get_jobs_index_key(), time.time() - JOB_TTL, "+inf"
+    )]
+    
+    async with redis.pipeline(transaction=False) as pipe:
+        for job_id in job_ids:
+            pipe.hmget(get_job_key(job_id), "completed", "status", "worker_id")
+        results = await pipe.execute()
+    
+    unfinished = {}
+    for job_id, values in zip(job_ids, results):
+        completed, status, worker_id = (orjson.loads(v) if v is not None else None for v in values)
+        if status is not None and not completed and status != "error":
+            unfinished[job_id] = worker_id
+    
+    worker_ids = list({worker_id for worker_id in unfinished.values() if worker_id})
+    async with redis.pipeline(transaction=False) as pipe:
+        for worker_id in worker_ids:
+            pipe.exists(get_worker_key(worker_id))
+        alive = {worker_id for worker_id, exists in zip(worker_ids, await pipe.execute()) if exists}
+    
+    # Only act on jobs that were already orphaned, by the same worker, on an earlier pass
+    now = time.time()
+    suspected = {
+        job_id.decode(): orjson.loads(seen)
+        for job_id, seen in (await redis.hgetall(ORPHANED_JOBS_KEY)).items()
+    }
+    
+    confirmed = {}
+    pending = {}
+    for job_id, worker_id in unfinished.items():
+        if worker_id in alive:
+            continue
+        
+        seen = suspected.get(job_id)
+        if seen is None or seen[0] != worker_id:
+            pending[job_id] = [worker_id, now]
+        elif now - seen[1] < WORKER_HEARTBEAT_TTL:
+            pending[job_id] = seen
+        else:
+            confirmed[job_id] = worker_id
+    
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.delete(ORPHANED_JOBS_KEY)
+        if pending:
+            pipe.hset(ORPHANED_JOBS_KEY, mapping={k: orjson.dumps(v) for k, v in pending.items()})
+            pipe.expire(ORPHANED_JOBS_KEY, JOB_TTL)
+        await pipe.execute()
+    
+    for job_id, worker_id in confirmed.items():
+        if not await requeue_job(job_id, worker_id):
+            await update_job(
+                job_id,
+                owner=worker_id,
+                status="error",
+                error="Upload interrupted by a server restart"
+            )
+
+
+async def requeue_job(job_id: str, worker_id: Optional[str]) -> bool:
+    """
+    Take over an orphaned job from worker_id and restart it on this worker
+    from its persisted video copy.
+    The upload starts over, since the YouTube upload session is not kept.
+    Returns False if the job cannot be resumed or was already taken over.
+    """
+    redis = get_redis()
+    resume = await redis.get(get_job_resume_key(job_id))
+    job = await get_job(job_id)
+    if resume is None or job is None:
+        return False
+    
+    resume = orjson.loads(resume)
+    video_path = Path(resume["video_path"])
+    try:
+        video_file = open(video_path, "rb")
+    except FileNotFoundError:
+        return False
+    
+    taken = await update_job(
+        job_id,
+        owner=worker_id,
+        worker_id=WORKER_ID,
+        status="queued",
+        video_progress=0,
+        error=None
+    )
+    if not taken:
+        video_file.close()
+        return False
+    
+    task = asyncio.create_task(process_upload_job(
+        job_id=job_id,
+        profile=job["profile"],
+        video_file=video_file,
+        video_mimetype=resume["video_mimetype"],
+        video_path=video_path,
+        subtitle_path=Path(resume["subtitle_path"]) if resume["subtitle_path"] else None,
+        title=job["title"],
+        description=resume["description"],
+        privacy=resume["privacy"],
+        language=resume["language"]
+    ))
+    _recovered_tasks.add(task)
+    task.add_done_callback(_recovered_tasks.discard)
+    return True
+
 
-def load_credentials(profile: str) -> Optional[Credentials]:
-    """Load stored credentials for a profile"""
-    from auth import load_credentials as auth_load_credentials
-    return auth_load_credentials(profile)
+async def create_job(job: Dict[str, Any], resume: Optional[Dict[str, Any]] = None):
+    """Store a new upload job, with the parameters to re-queue it if given"""
+    key = get_job_key(job["job_id"])
+    created = time.time()
+    
+    async with get_redis().pipeline(transaction=True) as pipe:
+        pipe.hset(key, mapping={k: orjson.dumps(v) for k, v in job.items()})
+        pipe.expire(key, JOB_TTL)
+        if resume:
+            pipe.set(get_job_resume_key(job["job_id"]), orjson.dumps(resume), ex=JOB_TTL)
+        for index_key in (get_jobs_index_key(), get_jobs_index_key(job["profile"])):
+            # Drop index entries of jobs that have expired since
+            pipe.zremrangebyscore(index_key, "-inf", created - JOB_TTL)
+            pipe.zadd(index_key, {job["job_id"]: created})
+        await pipe.execute()
 
 
-def get_youtube_client(profile: str):
-    """Get authenticated YouTube API client"""
-    creds = load_credentials(profile)
+async def update_job(job_id: str, owner: Optional[str] = WORKER_ID, **fields) -> bool:
+    """
+    Update fields of an upload job and publish the change to stream subscribers.
+    Only applied while the job is run by owner (this worker by default);
+    returns False if the job was taken over or no longer exists.
+    """
+    global _update_job_script
+    redis = get_redis()
+    if _update_job_script is None:
+        _update_job_script = redis.register_script(UPDATE_JOB_SCRIPT)
+    
+    args = [orjson.dumps(owner), JOB_TTL, orjson.dumps(fields)]
+    for k, v in fields.items():
+        args += [k, orjson.dumps(v)]
+    
+    return bool(await _update_job_script(keys=[get_job_key(job_id)], args=args, client=redis))
+
+
+async def update_own_job(job_id: str, **fields):
+    """Update a job run by this worker; raises JobLostError if it was taken over"""
+    if not await update_job(job_id, **fields):
+        raise JobLostError(job_id)
+
+
+def decode_job(data: Dict[bytes, bytes]) -> Dict[str, Any]:
+    """Decode a job hash as returned by Redis"""
+    return {k.decode(): orjson.loads(v) for k, v in data.items()}
+
+
+async def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Get an upload job, or None if it does not exist"""
+    data = await get_redis().hgetall(get_job_key(job_id))
+    return decode_job(data) if data else None
+
+
+async def get_youtube_client(profile: str):
+    """Get authenticated YouTube API client (cached per profile)"""
+    youtube = await get_cached_client(profile)
+    
+    if not youtube:
+        raise HTTPException(
+            status_code=401,
+            detail=f"Not authenticated. Please login first with profile: {profile}"
+        )
+    
+    return youtube
+
+
+async def get_upload_http(profile: str) -> AuthorizedHttp:
+    """
+    Get an authorized HTTP connection dedicated to one upload job.
+    httplib2 is not thread-safe, so jobs running in the pool must not
+    share the cached client's connection.
+    """
+    creds = await load_credentials(profile)
     
     if not creds:
         raise HTTPException(
@@ -54,28 +365,147 @@ def get_youtube_client(profile: str):
             detail=f"Not authenticated. Please login first with profile: {profile}"
         )
     
-    return build("youtube", "v3", credentials=creds)
+    return AuthorizedHttp(creds, http=build_http())
+
+
+def copy_spooled_file(spooled, destination: Path):
+    """
+    Copy a spooled temp file that has already rolled over to disk.
+    Hard-links it when the temp file has a name, otherwise copies in the kernel.
+    """
+    src = spooled._file
+    src.flush()
+    
+    name = getattr(src, "name", None)
+    if isinstance(name, str):
+        try:
+            os.link(name, destination)
+            return
+        except OSError:
+            pass
+    
+    with open(destination, "wb") as out_file:
+        if sys.platform == "linux":
+            size = os.fstat(src.fileno()).st_size
+            offset = 0
+            while offset < size:
+                sent = os.sendfile(out_file.fileno(), src.fileno(), offset, size - offset)
+                if not sent:
+                    break
+                offset += sent
+        else:
+            src.seek(0)
+            shutil.copyfileobj(src, out_file, COPY_CHUNK_SIZE)
 
 
 async def save_upload_file(upload_file: UploadFile, destination: Path) -> Path:
-    """Save uploaded file to disk"""
-    async with aiofiles.open(destination, 'wb') as out_file:
-        content = await upload_file.read()
-        await out_file.write(content)
+    """Save uploaded file to disk in chunks, keeping memory use bounded"""
+    # Larger files are already on disk: copy without reading through Python
+    if getattr(upload_file.file, "_rolled", False):
+        await asyncio.get_running_loop().run_in_executor(
+            None, copy_spooled_file, upload_file.file, destination
+        )
+        return destination
+    
+    async with aiofiles.open(destination, 'wb', buffering=COPY_CHUNK_SIZE) as out_file:
+        while chunk := await upload_file.read(COPY_CHUNK_SIZE):
+            await out_file.write(chunk)
     return destination
 
 
+class MmapFile(io.RawIOBase):
+    """
+    Read-only, seekable view over a memory-mapped file.
+    read() returns memoryview slices of the mapping instead of new bytes objects.
+    """
+    
+    def __init__(self, fileobj: BinaryIO):
+        super().__init__()
+        self._mmap = mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        self._pos = 0
+    
+    def readable(self) -> bool:
+        return True
+    
+    def seekable(self) -> bool:
+        return True
+    
+    def tell(self) -> int:
+        return self._pos
+    
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        self._pos = max(0, min(offset, len(self._view)))
+        return self._pos
+    
+    def read(self, size: int = -1) -> memoryview:
+        end = len(self._view) if size is None or size < 0 else min(self._pos + size, len(self._view))
+        chunk = self._view[self._pos:end]
+        self._pos = end
+        return chunk
+    
+    def readall(self) -> memoryview:
+        return self.read()
+    
+    def close(self):
+        if not self.closed:
+            self._view.release()
+            try:
+                self._mmap.close()
+            except BufferError:
+                # Slices still referenced elsewhere; the mapping is freed with them
+                pass
+        super().close()
+
+
+class MmapMediaUpload(MediaIoBaseUpload):
+    """
+    MediaIoBaseUpload that reads the file through a memory map,
+    letting the page cache feed chunks without per-chunk bytes copies.
+    Falls back to reading the file directly if it cannot be mapped.
+    """
+    
+    def __init__(self, fileobj: BinaryIO, mimetype: str, chunksize: int, resumable: bool):
+        try:
+            stream = MmapFile(fileobj)
+        except (ValueError, OSError):
+            # Empty or non-mappable file
+            stream = fileobj
+        super().__init__(stream, mimetype, chunksize=chunksize, resumable=resumable)
+
+
+def detach_upload_file(upload_file: UploadFile) -> BinaryIO:
+    """
+    Take over the spooled temp file behind an UploadFile.
+    The returned file stays open after the request closes its form files.
+    """
+    # fileno() rolls an in-memory spool over to disk; dup() gives us our own handle
+    fd = os.dup(upload_file.file.fileno())
+    video_file = os.fdopen(fd, "rb")
+    video_file.seek(0)
+    return video_file
+
+
 def upload_video_to_youtube(
     youtube,
-    video_path: Path,
+    video_file: BinaryIO,
     title: str,
     description: str = "",
     privacy: str = "private",
     category_id: str = "22",  # People & Blogs
-    job_id: str = None
+    mimetype: str = "video/*",
+    on_progress: Optional[Callable[[int], None]] = None,
+    before_request: Optional[Callable[[], None]] = None,
+    http: Optional[AuthorizedHttp] = None
 ) -> Optional[str]:
     """
     Upload video to YouTube using resumable upload.
+    Calls on_progress with the percentage whenever it changes, and
+    before_request before sending each chunk (it may raise to stop the upload).
     Returns video ID on success.
     """
     body = {
@@ -90,12 +520,17 @@ def upload_video_to_youtube(
         }
     }
     
-    # Resumable upload for large files
-    media = MediaFileUpload(
-        str(video_path),
-        chunksize=1024 * 1024,  # 1MB chunks
-        resumable=True
-    )
+    # Resumable upload for large files; small ones skip the upload session round-trip
+    resumable = os.fstat(video_file.fileno()).st_size > UPLOAD_CHUNK_SIZE
+    if resumable:
+        media = MmapMediaUpload(
+            video_file,
+            mimetype=mimetype,
+            chunksize=UPLOAD_CHUNK_SIZE,
+            resumable=True
+        )
+    else:
+        media = MediaIoBaseUpload(video_file, mimetype=mimetype, resumable=False)
     
     request = youtube.videos().insert(
         part="snippet,status",
@@ -104,32 +539,49 @@ def upload_video_to_youtube(
     )
     
     response = None
-    file_size = video_path.stat().st_size
+    last_progress = None
+    retry = 0
     
-    while response is None:
-        try:
-            status, response = request.next_chunk()
+    try:
+        while response is None:
+            try:
+                if before_request:
+                    before_request()
+                
+                if resumable:
+                    status, response = request.next_chunk(http=http)
+                else:
+                    status, response = None, request.execute(http=http)
+                
+                if status and on_progress:
+                    progress = int(status.progress() * 100)
+                    if progress != last_progress:
+                        last_progress = progress
+                        on_progress(progress)
             
-            if status and job_id:
-                progress = int(status.progress() * 100)
-                upload_jobs[job_id]["video_progress"] = progress
-                upload_jobs[job_id]["status"] = f"Uploading video... {progress}%"
-        
-        except HttpError as e:
-            if e.resp.status == 403:
-                raise HTTPException(
-                    status_code=403,
-                    detail="YouTube API quota exceeded. Please try again tomorrow."
-                )
-            elif e.resp.status in [500, 502, 503, 504]:
-                # Retry on server errors
-                asyncio.sleep(5)
-                continue
-            else:
-                raise HTTPException(
-                    status_code=e.resp.status,
-                    detail=f"YouTube API error: {e.error_details}"
-                )
+            except HttpError as e:
+                if e.resp.status == 403:
+                    raise HTTPException(
+                        status_code=403,
+                        detail="YouTube API quota exceeded. Please try again tomorrow."
+                    )
+                elif e.resp.status in [500, 502, 503, 504]:
+                    # Retry on server errors with exponential backoff + jitter
+                    retry += 1
+                    if retry > MAX_RETRIES:
+                        raise HTTPException(
+                            status_code=e.resp.status,
+                            detail=f"YouTube API error after {MAX_RETRIES} retries: {e.error_details}"
+                        )
+                    time.sleep(min(MAX_RETRY_DELAY, 2 ** retry) + random.random())
+                    continue
+                else:
+                    raise HTTPException(
+                        status_code=e.resp.status,
+                        detail=f"YouTube API error: {e.error_details}"
+                    )
+    finally:
+        media.stream().close()
     
     if response and "id" in response:
         return response["id"]
@@ -142,7 +594,8 @@ def upload_caption_to_youtube(
     video_id: str,
     caption_path: Path,
     language: str = "en",
-    name: str = "English"
+    name: str = "English",
+    http: Optional[AuthorizedHttp] = None
 ) -> bool:
     """
     Upload caption/subtitle file to YouTube.
@@ -164,7 +617,7 @@ def upload_caption_to_youtube(
             part="snippet",
             body=body,
             media_body=media
-        ).execute()
+        ).execute(http=http)
         return True
     
     except HttpError as e:
@@ -172,10 +625,23 @@ def upload_caption_to_youtube(
         return False
 
 
+async def finalize_video_meta(job_id: str, video_id: str, status: str):
+    """Record the uploaded video's ID and URL on the job"""
+    await update_own_job(
+        job_id,
+        video_id=video_id,
+        video_progress=100,
+        video_url=f"https://youtu.be/{video_id}",
+        status=status
+    )
+
+
 async def process_upload_job(
     job_id: str,
     profile: str,
-    video_path: Path,
+    video_file: BinaryIO,
+    video_mimetype: str,
+    video_path: Optional[Path],
     subtitle_path: Optional[Path],
     title: str,
     description: str,
@@ -183,68 +649,120 @@ async def process_upload_job(
     language: str
 ):
     """Background task to process video upload"""
+    loop = asyncio.get_running_loop()
+    progress_updates = []
+    lost = threading.Event()
+    owned = True
+    
+    async def record_progress(progress: int):
+        if not await update_job(job_id, video_progress=progress, status=f"Uploading video... {progress}%"):
+            lost.set()
+    
+    def report_progress(progress: int):
+        # May be called off the event loop, so hand the write back to it
+        progress_updates.append(asyncio.run_coroutine_threadsafe(record_progress(progress), loop))
+    
+    async def is_owner() -> bool:
+        worker_id = await get_redis().hget(get_job_key(job_id), "worker_id")
+        return worker_id is not None and orjson.loads(worker_id) == WORKER_ID
+    
+    def check_owner():
+        # Once our heartbeat may have lapsed the job can be re-queued on another worker,
+        # so don't send more of the video until it is renewed and the job is still ours
+        if time.monotonic() >= _heartbeat_valid_until:
+            if not wait_for_heartbeat():
+                raise JobLostError(job_id)
+            if not asyncio.run_coroutine_threadsafe(is_owner(), loop).result():
+                lost.set()
+        
+        # Stop sending chunks once another worker has taken the job over
+        if lost.is_set():
+            raise JobLostError(job_id)
+    
     try:
-        upload_jobs[job_id]["status"] = "Initializing..."
+        await update_own_job(job_id, status="Initializing...")
         
-        # Get YouTube client
-        youtube = get_youtube_client(profile)
+        # Get YouTube client and a connection of our own for the worker thread
+        youtube = await get_youtube_client(profile)
+        http = await get_upload_http(profile)
         
         # Upload video
-        upload_jobs[job_id]["status"] = "Uploading video..."
-        video_id = upload_video_to_youtube(
+        await update_own_job(job_id, status="Uploading video...")
+        video_id = await loop.run_in_executor(_upload_pool, partial(
+            upload_video_to_youtube,
             youtube=youtube,
-            video_path=video_path,
+            video_file=video_file,
             title=title,
             description=description,
             privacy=privacy,
-            job_id=job_id
-        )
+            mimetype=video_mimetype,
+            on_progress=report_progress,
+            before_request=check_owner,
+            http=http
+        ))
+        
+        # Let pending progress writes land before the final status (best-effort)
+        await asyncio.gather(*(asyncio.wrap_future(f) for f in progress_updates), return_exceptions=True)
         
         if not video_id:
-            upload_jobs[job_id]["status"] = "error"
-            upload_jobs[job_id]["error"] = "Failed to upload video"
+            await update_own_job(job_id, status="error", error="Failed to upload video")
             return
         
-        upload_jobs[job_id]["video_id"] = video_id
-        upload_jobs[job_id]["video_progress"] = 100
-        upload_jobs[job_id]["status"] = "Video uploaded successfully"
-        
-        # Upload subtitle if provided
+        # Upload subtitle if provided, while the video result is being recorded
         if subtitle_path and subtitle_path.exists():
-            upload_jobs[job_id]["status"] = "Uploading subtitle..."
-            
-            success = upload_caption_to_youtube(
-                youtube=youtube,
-                video_id=video_id,
-                caption_path=subtitle_path,
-                language=language
+            _, success = await asyncio.gather(
+                finalize_video_meta(job_id, video_id, status="Video uploaded, uploading subtitle..."),
+                loop.run_in_executor(_upload_pool, partial(
+                    upload_caption_to_youtube,
+                    youtube=youtube,
+                    video_id=video_id,
+                    caption_path=subtitle_path,
+                    language=language,
+                    http=http
+                ))
             )
             
             if success:
-                upload_jobs[job_id]["subtitle_uploaded"] = True
-                upload_jobs[job_id]["status"] = "Completed with subtitle"
+                await update_own_job(job_id, subtitle_uploaded=True, completed=True, status="Completed with subtitle")
             else:
-                upload_jobs[job_id]["subtitle_uploaded"] = False
-                upload_jobs[job_id]["status"] = "Completed (subtitle failed)"
+                await update_own_job(job_id, subtitle_uploaded=False, completed=True, status="Completed (subtitle failed)")
         else:
-            upload_jobs[job_id]["status"] = "Completed"
-        
-        upload_jobs[job_id]["completed"] = True
-        upload_jobs[job_id]["video_url"] = f"https://youtu.be/{video_id}"
+            await finalize_video_meta(job_id, video_id, status="Video uploaded successfully")
+            await update_own_job(job_id, completed=True, status="Completed")
+    
+    except JobLostError:
+        # The new worker owns the job's resume data and files now
+        owned = False
+        print(f"Job {job_id} was taken over by another worker, stopping")
         
     except Exception as e:
-        upload_jobs[job_id]["status"] = "error"
-        upload_jobs[job_id]["error"] = str(e)
+        if getattr(e, "status_code", None) == 401 or (isinstance(e, HttpError) and e.resp.status == 401):
+            # Token was rejected; rebuild the client on next use
+            invalidate_client(profile)
+        # Don't let a late progress write overwrite the error status
+        await asyncio.gather(*(asyncio.wrap_future(f) for f in progress_updates), return_exceptions=True)
+        owned = await update_job(job_id, status="error", error=str(e))
     
     finally:
-        # Clean up temp files
         try:
-            if video_path.exists():
-                video_path.unlink()
-            if subtitle_path and subtitle_path.exists():
-                subtitle_path.unlink()
+            video_file.close()
         except:
             pass
+        
+        if owned:
+            # Clean up temp files
+            try:
+                await get_redis().delete(get_job_resume_key(job_id))
+            except Exception as e:
+                print(f"Error removing resume data for job {job_id}: {e}")
+            
+            try:
+                if video_path and video_path.exists():
+                    video_path.unlink()
+                if subtitle_path and subtitle_path.exists():
+                    subtitle_path.unlink()
+            except:
+                pass
 
 
 @router.post("/upload")
@@ -281,7 +799,7 @@ async def upload_video(
             )
     
     # Check authentication
-    creds = load_credentials(profile)
+    creds = await load_credentials(profile)
     if not creds:
         raise HTTPException(
             status_code=401,
@@ -291,9 +809,13 @@ async def upload_video(
     # Generate job ID
     job_id = str(uuid.uuid4())
     
-    # Save files to temp directory
-    video_path = UPLOAD_DIR / f"{job_id}_{video.filename}"
-    await save_upload_file(video, video_path)
+    # Optionally keep a durable copy of the video so the job survives a restart
+    video_path = None
+    if PERSIST_UPLOADS:
+        video_path = UPLOAD_DIR / f"{job_id}_{video.filename}"
+        await save_upload_file(video, video_path)
+    
+    video_mimetype = video.content_type if (video.content_type or "").startswith("video/") else "video/*"
     
     if subtitle:
         subtitle_path = UPLOAD_DIR / f"{job_id}_{subtitle.filename}"
@@ -302,8 +824,19 @@ async def upload_video(
     # Use filename as title if not provided
     video_title = title or Path(video.filename).stem
     
+    resume = None
+    if video_path:
+        resume = {
+            "video_path": str(video_path),
+            "video_mimetype": video_mimetype,
+            "subtitle_path": str(subtitle_path) if subtitle_path else None,
+            "description": description,
+            "privacy": privacy,
+            "language": language
+        }
+    
     # Initialize job status
-    upload_jobs[job_id] = {
+    await create_job({
         "job_id": job_id,
         "profile": profile,
         "video_filename": video.filename,
@@ -316,14 +849,21 @@ async def upload_video(
         "subtitle_uploaded": False,
         "completed": False,
         "error": None,
+        "worker_id": WORKER_ID,
         "created_at": datetime.now().isoformat()
-    }
+    }, resume=resume)
+    
+    # Upload from the request's temp file instead of copying it first.
+    # Taken last, so nothing can fail between opening the handle and handing it to the job.
+    video_file = detach_upload_file(video)
     
     # Start background upload task
     background_tasks.add_task(
         process_upload_job,
         job_id=job_id,
         profile=profile,
+        video_file=video_file,
+        video_mimetype=video_mimetype,
         video_path=video_path,
         subtitle_path=subtitle_path,
         title=video_title,
@@ -342,22 +882,88 @@ async def upload_video(
 @router.get("/upload/status/{job_id}")
 async def get_upload_status(job_id: str):
     """Get the status of an upload job"""
-    if job_id not in upload_jobs:
+    job = await get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return job
+
+
+@router.get("/upload/stream/{job_id}")
+async def stream_upload_status(job_id: str):
+    """Stream status updates of an upload job as Server-Sent Events"""
+    # Subscribe before reading the snapshot so no update is missed in between
+    pubsub = get_pubsub_redis().pubsub()
+    try:
+        await pubsub.subscribe(get_job_key(job_id))
+    except RedisConnectionError:
+        # Stream pool exhausted; clients fall back to polling /upload/status
+        await pubsub.aclose()
+        raise HTTPException(status_code=503, detail="Too many open status streams")
+    
+    job = await get_job(job_id)
+    if job is None:
+        await pubsub.aclose()
         raise HTTPException(status_code=404, detail="Job not found")
     
-    return upload_jobs[job_id]
+    async def events():
+        try:
+            yield b"data: " + orjson.dumps(job) + b"\n\n"
+            
+            while not job.get("completed") and job.get("status") != "error":
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True,
+                    timeout=STREAM_KEEPALIVE
+                )
+                if message is None:
+                    # Quiet for a while: stop if the job expired or was deleted
+                    latest = await get_job(job_id)
+                    if latest is None:
+                        break
+                    
+                    if latest != job:
+                        job.clear()
+                        job.update(latest)
+                        yield b"data: " + orjson.dumps(job) + b"\n\n"
+                    else:
+                        yield b": keep-alive\n\n"
+                    continue
+                
+                job.update(orjson.loads(message["data"]))
+                yield b"data: " + orjson.dumps(job) + b"\n\n"
+        finally:
+            # Shielded: on client disconnect the cancellation is re-delivered here,
+            # and an interrupted close never returns the connection to the pool
+            with anyio.CancelScope(shield=True):
+                await pubsub.aclose()
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
 
 
 @router.get("/upload/jobs")
-async def list_upload_jobs(profile: Optional[str] = None):
-    """List all upload jobs, optionally filtered by profile"""
-    jobs = list(upload_jobs.values())
+async def list_upload_jobs(
+    profile: Optional[str] = None,
+    limit: int = Query(default=100, ge=1, le=1000, description="Maximum number of jobs to return")
+):
+    """List recent upload jobs (newest first), optionally filtered by profile"""
+    redis = get_redis()
+    index_key = get_jobs_index_key(profile)
+    
+    # Newest first, skipping index entries older than the job TTL
+    job_ids = await redis.zrevrangebyscore(
+        index_key, "+inf", time.time() - JOB_TTL, start=0, num=limit
+    )
     
-    if profile:
-        jobs = [j for j in jobs if j.get("profile") == profile]
+    async with redis.pipeline(transaction=False) as pipe:
+        for job_id in job_ids:
+            pipe.hgetall(get_job_key(job_id.decode()))
+        results = await pipe.execute()
     
-    # Sort by created_at descending
-    jobs.sort(key=lambda x: x.get("created_at", ""), reverse=True)
+    jobs = [decode_job(data) for data in results if data]
     
     return {"jobs": jobs}
 
@@ -365,11 +971,16 @@ async def list_upload_jobs(profile: Optional[str] = None):
 @router.delete("/upload/job/{job_id}")
 async def delete_upload_job(job_id: str):
     """Delete a completed upload job from the list"""
-    if job_id not in upload_jobs:
+    job = await get_job(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    if not upload_jobs[job_id].get("completed") and upload_jobs[job_id].get("status") != "error":
+    if not job.get("completed") and job.get("status") != "error":
         raise HTTPException(status_code=400, detail="Cannot delete job in progress")
     
-    del upload_jobs[job_id]
+    async with get_redis().pipeline(transaction=True) as pipe:
+        pipe.delete(get_job_key(job_id), get_job_resume_key(job_id))
+        pipe.zrem(get_jobs_index_key(), job_id)
+        pipe.zrem(get_jobs_index_key(job["profile"]), job_id)
+        await pipe.execute()
     return {"success": True, "message": "Job deleted"}
@@ -210,9 +210,9 @@ const Dashboard: React.FC = () => {
           f.id === file.id ? { ...f, jobId: response.job_id } : f
         ));
 
-        // Poll for status
+        // Watch status
         await new Promise<void>((resolve) => {
-          const cancel = api.pollUploadStatus(response.job_id, (job) => {
+          const cancel = api.streamUploadStatus(response.job_id, (job) => {
             setFiles(prev => prev.map(f => {
               if (f.id !== file.id) return f;
 
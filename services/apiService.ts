@@ -184,3 +184,44 @@ export const pollUploadStatus = (
     // Return cancel function
     return () => { active = false; };
 };
+
+// Streaming helper for upload progress (Server-Sent Events).
+// Falls back to polling if the stream cannot be opened.
+export const streamUploadStatus = (
+    jobId: string,
+    onUpdate: (job: UploadJob) => void
+): () => void => {
+    if (typeof EventSource === 'undefined') {
+        return pollUploadStatus(jobId, onUpdate);
+    }
+
+    let cancelFallback: (() => void) | null = null;
+    let lastJob: UploadJob | null = null;
+    const source = new EventSource(`${API_BASE}/upload/stream/${jobId}`);
+
+    source.onmessage = (event) => {
+        const job: UploadJob = JSON.parse(event.data);
+        lastJob = job;
+        onUpdate(job);
+
+        // Close stream when completed or error
+        if (job.completed || job.error) {
+            source.close();
+        }
+    };
+
+    source.onerror = () => {
+        // Stream unavailable before any update, or a reconnect was refused
+        // (e.g. too many open streams): switch to polling
+        if ((!lastJob || source.readyState === EventSource.CLOSED) && !cancelFallback) {
+            source.close();
+            cancelFallback = pollUploadStatus(jobId, onUpdate);
+        }
+    };
+
+    // Return cancel function
+    return () => {
+        source.close();
+        cancelFallback?.();
+    };
+};